@@ -0,0 +1,170 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, insert, literal, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+
+from database import (
+    SessionLocal, Train, Booking, Payment,
+    ArchivedTrain, ArchivedBooking, ArchivedPayment,
+)
+import fare_engine
+import availability
+
+# Trains are archived this many days after arrival
+ARCHIVE_AFTER_DAYS = 7
+BATCH_SIZE = 500
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+HOT_TABLES = ("trains", "bookings", "payments")
+BOOKING_PAGE_SIZE = 50
+
+
+def mark_completed(db, now):
+    # Scheduled trains that have arrived are completed. Delayed trains are
+    # left for an admin to close, since their scheduled arrival is not reliable.
+    updated = db.query(Train).filter(
+        Train.arrival_time < now,
+        Train.train_status == "scheduled"
+    ).update({Train.train_status: "completed"}, synchronize_session=False)
+
+    # Confirmed bookings get the terminal status matching their train
+    for train_status, booking_status in (("completed", "completed"), ("cancelled", "cancelled")):
+        trains = select(Train.train_id).where(Train.train_status == train_status)
+        db.query(Booking).filter(
+            Booking.train_id.in_(trains),
+            Booking.booking_status == "confirmed"
+        ).update({Booking.booking_status: booking_status}, synchronize_session=False)
+    return updated
+
+
+def _copy_rows(db, source, target, condition, archived_at):
+    names = [column.name for column in source.__table__.columns]
+    rows = select(
+        *[source.__table__.c[name] for name in names],
+        literal(archived_at, DateTime)
+    ).where(condition)
+    db.execute(insert(target.__table__).from_select(names + ["archived_at"], rows))
+
+
+def hot_table_bytes(db):
+    # Size of the hot tables and their indexes; None when the database
+    # cannot report it (non-SQLite, or SQLite built without dbstat)
+    if db.get_bind().dialect.name != "sqlite":
+        return None
+
+    placeholders = ", ".join(f"'{table}'" for table in HOT_TABLES)
+    try:
+        return db.execute(text(
+            "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ("
+            f"SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders}))"
+        )).scalar()
+    except OperationalError:
+        return None
+
+
+def archive_completed_journeys(db, archive_after_days=ARCHIVE_AFTER_DAYS, batch_size=BATCH_SIZE, vacuum=False):
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=archive_after_days)
+
+    mark_completed(db, now)
+    db.commit()
+
+    bytes_before = hot_table_bytes(db)
+    moved = {"trains": 0, "bookings": 0, "payments": 0}
+
+    while True:
+        train_ids = [
+            row.train_id for row in db.query(Train.train_id).filter(
+                Train.train_status.in_(ARCHIVABLE_STATUSES),
+                Train.arrival_time < cutoff
+            ).order_by(Train.train_id).limit(batch_size)
+        ]
+        if not train_ids:
+            break
+
+        booking_ids = select(Booking.booking_id).where(Booking.train_id.in_(train_ids))
+
+        # Copy everything before deleting anything, all in one transaction per batch
+        _copy_rows(db, Train, ArchivedTrain, Train.train_id.in_(train_ids), now)
+        _copy_rows(db, Booking, ArchivedBooking, Booking.train_id.in_(train_ids), now)
+        _copy_rows(db, Payment, ArchivedPayment, Payment.booking_id.in_(booking_ids), now)
+
+        moved["payments"] += db.query(Payment).filter(
+            Payment.booking_id.in_(booking_ids)
+        ).delete(synchronize_session=False)
+        moved["bookings"] += db.query(Booking).filter(
+            Booking.train_id.in_(train_ids)
+        ).delete(synchronize_session=False)
+        moved["trains"] += db.query(Train).filter(
+            Train.train_id.in_(train_ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        for train_id in train_ids:
+            fare_engine.invalidate(train_id)
+            availability.broker.publish(availability.deleted_delta(train_id))
+
+    if vacuum and db.get_bind().dialect.name == "sqlite":
+        # Rewrites the file so freed pages are returned to the filesystem
+        with db.get_bind().connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+
+    bytes_after = hot_table_bytes(db)
+    elapsed = time.perf_counter() - start
+    total_rows = sum(moved.values())
+
+    return {
+        **moved,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(total_rows / elapsed, 1) if elapsed else None,
+        "reclaimed_bytes": (
+            bytes_before - bytes_after
+            if bytes_before is not None and bytes_after is not None else None
+        ),
+    }
+
+
+def user_booking_history(db, user_id, skip=0, limit=BOOKING_PAGE_SIZE):
+    # Hot bookings (current and recent journeys) come first, then archived
+    # ones, each newest booking first. The archive is only queried once the
+    # requested page runs past the end of the hot rows.
+    hot_query = db.query(Booking).options(joinedload(Booking.train)).filter(
+        Booking.user_id == user_id
+    ).order_by(Booking.booking_date.desc(), Booking.booking_id.desc())
+
+    bookings = hot_query.offset(skip).limit(limit).all()
+    if limit is not None and len(bookings) >= limit:
+        return bookings
+
+    if bookings or not skip:
+        archive_skip = 0
+    else:
+        archive_skip = max(skip - hot_query.count(), 0)
+
+    archive_query = db.query(ArchivedBooking).options(joinedload(ArchivedBooking.train)).filter(
+        ArchivedBooking.user_id == user_id
+    ).order_by(ArchivedBooking.booking_date.desc(), ArchivedBooking.booking_id.desc())
+
+    remaining = None if limit is None else limit - len(bookings)
+    return bookings + archive_query.offset(archive_skip).limit(remaining).all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move past journeys into the archive tables")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive trains this many days after arrival")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the database file")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = archive_completed_journeys(db, args.days, args.batch_size, args.vacuum)
+        print(f"Archived {report['trains']} trains, {report['bookings']} bookings and {report['payments']} payments")
+        print(f"Took {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)")
+        if report["reclaimed_bytes"] is not None:
+            print(f"Hot tables shrank by {report['reclaimed_bytes']} bytes")
+    finally:
+        db.close()
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+
+from starlette.concurrency import run_in_threadpool
+
+import fare_engine
+
+# At most one availability event per connection per interval; deltas that
+# arrive in between are coalesced to the latest state of each train.
+MIN_PUBLISH_INTERVAL = 1.0
+HEARTBEAT_SECONDS = 15.0
+MAX_TRAINS_PER_SUBSCRIPTION = 50
+
+
+class Subscription:
+    def __init__(self, train_ids, loop):
+        self.train_ids = frozenset(train_ids)
+        self.loop = loop
+        self.event = asyncio.Event()
+        # train_id -> latest delta not yet sent to the client
+        self.pending = {}
+
+
+class AvailabilityBroker:
+    def __init__(self):
+        # Publishers run in the threadpool, subscribers on the event loop
+        self._lock = threading.Lock()
+        self._subscribers = {}  # train_id -> set of Subscription
+
+    def subscribe(self, train_ids):
+        subscription = Subscription(train_ids, asyncio.get_running_loop())
+        with self._lock:
+            for train_id in subscription.train_ids:
+                self._subscribers.setdefault(train_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for train_id in subscription.train_ids:
+                subscribers = self._subscribers.get(train_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[train_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    def publish(self, delta):
+        to_wake = []
+        with self._lock:
+            for subscription in self._subscribers.get(delta["train_id"], ()):
+                # Pending is bounded by the subscribed train_ids, so a slow
+                # client only ever holds the latest state per train.
+                if not subscription.pending:
+                    to_wake.append(subscription)
+                subscription.pending[delta["train_id"]] = delta
+
+        # One wakeup per event loop rather than one per subscriber
+        by_loop = {}
+        for subscription in to_wake:
+            by_loop.setdefault(subscription.loop, []).append(subscription.event)
+        for loop, events in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_set_all, events)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+
+    def drain(self, subscription):
+        with self._lock:
+            deltas = list(subscription.pending.values())
+            subscription.pending = {}
+            subscription.event.clear()
+        return deltas
+
+    async def stream(
+        self,
+        train_ids,
+        load_snapshot,
+        min_interval=MIN_PUBLISH_INTERVAL,
+        heartbeat=HEARTBEAT_SECONDS,
+    ):
+        subscription = self.subscribe(train_ids)
+        try:
+            # Snapshot after subscribing so no write can fall between the two
+            snapshot = await run_in_threadpool(load_snapshot)
+            yield format_event("snapshot", snapshot)
+
+            while True:
+                try:
+                    await asyncio.wait_for(subscription.event.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                deltas = self.drain(subscription)
+                if not deltas:
+                    continue
+
+                # The yield only returns once the server has accepted the
+                # chunk, which is what gives each connection backpressure.
+                yield format_event("availability", deltas)
+                await asyncio.sleep(min_interval)
+        finally:
+            self.unsubscribe(subscription)
+
+
+broker = AvailabilityBroker()
+
+
+def _set_all(events):
+    for event in events:
+        event.set()
+
+
+def train_delta(train):
+    # Fares move with occupancy, so they travel with every availability change
+    fares = fare_engine.fares_for(train)
+    return {
+        "train_id": train.train_id,
+        "available_seats": train.available_seats,
+        "total_seats": train.total_seats,
+        "train_status": train.train_status,
+        "current_fare": fares[fare_engine.DEFAULT_TRAVEL_CLASS],
+        "fares": fares,
+    }
+
+
+def deleted_delta(train_id):
+    return {"train_id": train_id, "deleted": True}
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# Drives GET /trains/stream on a single uvicorn worker with real sockets:
+# SUBSCRIBERS idle connections stay open while bookings are made through
+# the API, and every connection must receive each resulting event.
+SUBSCRIBERS = 10000
+BOOKINGS = 5
+TRAIN_ID = 1
+HOST = "127.0.0.1"
+PORT = 8765
+CONNECT_CONCURRENCY = 500
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def request(method, path, body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f"http://{HOST}:{PORT}{path}", data=data, headers=headers, method=method)
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+def server_rss_kib(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return None
+
+
+def start_server(workdir):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(PORT),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    for _ in range(100):
+        try:
+            request("GET", "/")
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+class Subscriber:
+    def __init__(self):
+        self.events = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(HOST, PORT)
+        self.writer.write(
+            f"GET /trains/stream?train_ids={TRAIN_ID} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+        # Wait for the snapshot so the subscription is known to be live
+        await self.reader.readuntil(b"event: snapshot")
+
+    async def listen(self):
+        marker = b"event: availability"
+        tail = b""
+        while True:
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                return
+            data = tail + chunk
+            self.events += data.count(marker)
+            # Keep enough bytes to catch a marker split across reads
+            tail = data[-(len(marker) - 1):]
+
+
+async def main():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, SUBSCRIBERS * 2 + 1024), hard))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # The server inherits the raised file descriptor limit
+        server = start_server(workdir)
+        try:
+            await run(server)
+        finally:
+            server.terminate()
+            try:
+                # Graceful shutdown can wait on streams still being torn down
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+
+async def run(server):
+    user = {
+        "username": "bench", "email": "bench@example.com", "password": "bench",
+        "first_name": "Bench", "last_name": "User",
+    }
+    await asyncio.to_thread(request, "POST", "/register", user)
+    login = await asyncio.to_thread(request, "POST", "/login", {"username": "bench", "password": "bench"})
+    token = login["access_token"]
+
+    rss_before = server_rss_kib(server.pid)
+
+    subscribers = [Subscriber() for _ in range(SUBSCRIBERS)]
+    limit = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def connect(subscriber):
+        async with limit:
+            await subscriber.connect()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connect(s) for s in subscribers))
+    print(f"Opened {SUBSCRIBERS} streams in {time.perf_counter() - start:.2f}s")
+    listeners = [asyncio.create_task(s.listen()) for s in subscribers]
+
+    # Let the connections go idle before measuring
+    await asyncio.sleep(2)
+    rss_idle = server_rss_kib(server.pid)
+    print(f"Server RSS: {rss_before / 1024:.1f} MiB before, {rss_idle / 1024:.1f} MiB with "
+          f"{SUBSCRIBERS} idle streams ({(rss_idle - rss_before) / SUBSCRIBERS:.2f} KiB per stream)")
+
+    latencies = []
+    for _ in range(BOOKINGS):
+        start = time.perf_counter()
+        await asyncio.to_thread(request, "GET", "/")
+        latencies.append(time.perf_counter() - start)
+    print(f"GET / with idle streams open: median {statistics.median(latencies) * 1000:.1f}ms")
+
+    fan_out = []
+    for booking in range(1, BOOKINGS + 1):
+        start = time.perf_counter()
+        await asyncio.to_thread(
+            request, "POST", "/bookings",
+            {"train_id": TRAIN_ID, "passengers_count": 1, "payment_method": "upi"}, token,
+        )
+        while min(s.events for s in subscribers) < booking:
+            await asyncio.sleep(0.01)
+        fan_out.append(time.perf_counter() - start)
+        # Stay above the per-connection rate cap so bookings are not coalesced
+        await asyncio.sleep(1.5)
+
+    print(f"Booking to event on all {SUBSCRIBERS} streams: median "
+          f"{statistics.median(fan_out) * 1000:.0f}ms, max {max(fan_out) * 1000:.0f}ms")
+
+    for listener in listeners:
+        listener.cancel()
+    for subscriber in subscribers:
+        subscriber.writer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
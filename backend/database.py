@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Boolean, Enum, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.schema import CreateTable, CreateIndex
+from contextlib import contextmanager
 import enum
 from datetime import datetime
 import os
@@ -73,6 +75,8 @@ class Railway(Base):
 
 class Train(Base):
     __tablename__ = "trains"
+    # Never reuse ids of rows moved to the archive tables
+    __table_args__ = {"sqlite_autoincrement": True}
     
     train_id = Column(Integer, primary_key=True, index=True)
     train_number = Column(String(10), unique=True, nullable=False)
@@ -97,6 +101,8 @@ class Train(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    # Never reuse ids of rows moved to the archive tables
+    __table_args__ = {"sqlite_autoincrement": True}
     
     booking_id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id"))
@@ -107,6 +113,7 @@ class Booking(Base):
     booking_status = Column(String(20), default="confirmed")  # Changed from Enum
     payment_status = Column(String(20), default="pending")  # Changed from Enum
     pnr_number = Column(String(10), unique=True, nullable=False)
+    travel_class = Column(String(20), default="sleeper")  # Priced by fare_engine.TRAVEL_CLASSES
     
     # Relationships
     user = relationship("User", back_populates="bookings")
@@ -115,6 +122,8 @@ class Booking(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    # Never reuse ids of rows moved to the archive tables
+    __table_args__ = {"sqlite_autoincrement": True}
     
     payment_id = Column(Integer, primary_key=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.booking_id"))
@@ -127,9 +136,223 @@ class Payment(Base):
     # Relationships
     booking = relationship("Booking", back_populates="payment")
 
+# Archive tables mirror the hot tables column for column (plus archived_at)
+# so rows can be moved with INSERT ... SELECT. See archive.py.
+class ArchivedTrain(Base):
+    __tablename__ = "archived_trains"
+    
+    train_id = Column(Integer, primary_key=True, index=True)
+    train_number = Column(String(10), nullable=False)
+    train_name = Column(String(100), nullable=False)
+    railway_id = Column(Integer, ForeignKey("railways.railway_id"))
+    source_station = Column(String(50), nullable=False)
+    destination_station = Column(String(50), nullable=False)
+    departure_time = Column(DateTime, nullable=False)
+    arrival_time = Column(DateTime, nullable=False)
+    total_seats = Column(Integer, nullable=False)
+    available_seats = Column(Integer, nullable=False)
+    base_fare = Column(Float, nullable=False)
+    train_status = Column(String(20), default="completed")
+    train_type = Column(String(50), default="Express")
+    created_by = Column(Integer, ForeignKey("users.user_id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    bookings = relationship("ArchivedBooking", back_populates="train")
+
+class ArchivedBooking(Base):
+    __tablename__ = "archived_bookings"
+    
+    booking_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), index=True)
+    train_id = Column(Integer, ForeignKey("archived_trains.train_id"))
+    booking_date = Column(DateTime, default=datetime.utcnow)
+    passengers_count = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    booking_status = Column(String(20), default="completed")
+    payment_status = Column(String(20), default="completed")
+    pnr_number = Column(String(10), nullable=False)
+    travel_class = Column(String(20), default="sleeper")
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    train = relationship("ArchivedTrain", back_populates="bookings")
+    payment = relationship("ArchivedPayment", back_populates="booking", uselist=False)
+
+class ArchivedPayment(Base):
+    __tablename__ = "archived_payments"
+    
+    payment_id = Column(Integer, primary_key=True, index=True)
+    booking_id = Column(Integer, ForeignKey("archived_bookings.booking_id"))
+    payment_amount = Column(Float, nullable=False)
+    payment_method = Column(String(20), nullable=False)
+    payment_date = Column(DateTime, default=datetime.utcnow)
+    transaction_id = Column(String(100))
+    payment_status = Column(String(20), default="completed")
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    booking = relationship("ArchivedBooking", back_populates="payment")
+
 # Create tables
 def create_tables():
+    recover_interrupted_rebuilds()
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    ensure_monotonic_ids()
+
+# (hot model, archive model, (child table, foreign key column) or None)
+ARCHIVED_TABLES = [
+    (Train, ArchivedTrain, ("bookings", "train_id")),
+    (Booking, ArchivedBooking, ("payments", "booking_id")),
+    (Payment, ArchivedPayment, None),
+]
+
+@contextmanager
+def _sqlite_transaction():
+    # pysqlite commits DDL on its own, so BEGIN/COMMIT are issued by hand to
+    # make a table rebuild all-or-nothing
+    raw = engine.raw_connection()
+    connection = raw.driver_connection
+    previous_isolation_level = connection.isolation_level
+    connection.isolation_level = None
+    cursor = connection.cursor()
+    try:
+        # Both must be set outside the transaction. legacy_alter_table keeps
+        # references from other tables pointing at a renamed table's old name.
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("PRAGMA legacy_alter_table=ON")
+        cursor.execute("BEGIN")
+        try:
+            yield cursor
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.execute("PRAGMA legacy_alter_table=OFF")
+        connection.isolation_level = previous_isolation_level
+        raw.close()
+
+def _sqlite_columns(cursor, name):
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({name})").fetchall()]
+
+def _sqlite_default(column):
+    # SQL literal for a column's scalar Python default, NULL otherwise
+    if column.default is None or not column.default.is_scalar:
+        return "NULL"
+    return repr(column.default.arg) if isinstance(column.default.arg, str) else str(column.default.arg)
+
+def _sqlite_table_sql(cursor, name):
+    row = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else None
+
+def add_missing_columns():
+    # create_all never alters existing tables, so columns added to a model
+    # later are added here with their default filled in for existing rows
+    if engine.dialect.name != "sqlite":
+        return
+    
+    with _sqlite_transaction() as cursor:
+        for table in Base.metadata.sorted_tables:
+            existing = _sqlite_columns(cursor, table.name)
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_sql = f"{column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.default is not None and column.default.is_scalar:
+                    column_sql += f" DEFAULT {_sqlite_default(column)}"
+                cursor.execute(f"ALTER TABLE {table.name} ADD COLUMN {column_sql}")
+
+def recover_interrupted_rebuilds():
+    # Earlier versions of ensure_monotonic_ids could stop between renaming a
+    # hot table to _<table>_old and copying its rows back
+    if engine.dialect.name != "sqlite":
+        return
+    
+    with _sqlite_transaction() as cursor:
+        for model, _, _ in ARCHIVED_TABLES:
+            table = model.__table__
+            old_name = f"_{table.name}_old"
+            if _sqlite_table_sql(cursor, old_name) is None:
+                continue
+            
+            if _sqlite_table_sql(cursor, table.name) is None:
+                cursor.execute(f"ALTER TABLE {old_name} RENAME TO {table.name}")
+            else:
+                # The old table may predate columns the new one has; those
+                # get their default
+                old_columns = _sqlite_columns(cursor, old_name)
+                columns = ", ".join(c.name for c in table.columns)
+                values = ", ".join(
+                    c.name if c.name in old_columns else _sqlite_default(c) for c in table.columns
+                )
+                cursor.execute(
+                    f"INSERT OR IGNORE INTO {table.name} ({columns}) SELECT {values} FROM {old_name}"
+                )
+                cursor.execute(f"DROP TABLE {old_name}")
+
+def ensure_monotonic_ids():
+    if engine.dialect.name != "sqlite":
+        return
+    
+    with _sqlite_transaction() as cursor:
+        for model, archive_model, child in ARCHIVED_TABLES:
+            table = model.__table__
+            
+            # Databases created before the archive tables existed let SQLite
+            # hand out the id of the highest row again once it is archived,
+            # so rebuild those tables with AUTOINCREMENT
+            if "AUTOINCREMENT" not in _sqlite_table_sql(cursor, table.name).upper():
+                old_name = f"_{table.name}_old"
+                columns = ", ".join(c.name for c in table.columns)
+                cursor.execute(f"ALTER TABLE {table.name} RENAME TO {old_name}")
+                index_names = [row[0] for row in cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (old_name,)
+                ).fetchall()]
+                for index_name in index_names:
+                    cursor.execute(f"DROP INDEX {index_name}")
+                cursor.execute(str(CreateTable(table).compile(dialect=engine.dialect)))
+                for index in table.indexes:
+                    cursor.execute(str(CreateIndex(index).compile(dialect=engine.dialect)))
+                cursor.execute(
+                    f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}"
+                )
+                cursor.execute(f"DROP TABLE {old_name}")
+            
+            # Start the sequence past every id already used in the hot or archive table
+            id_column = table.primary_key.columns.values()[0].name
+            highest = cursor.execute(
+                f"SELECT MAX(id) FROM (SELECT MAX({id_column}) AS id FROM {table.name} "
+                f"UNION ALL SELECT MAX({id_column}) FROM {archive_model.__tablename__} "
+                "UNION ALL SELECT seq FROM sqlite_sequence WHERE name = ?)",
+                (table.name,)
+            ).fetchone()[0] or 0
+            
+            # Hot rows that already reused an archived id get a fresh one
+            colliding_ids = [row[0] for row in cursor.execute(
+                f"SELECT {id_column} FROM {table.name} WHERE {id_column} IN "
+                f"(SELECT {id_column} FROM {archive_model.__tablename__})"
+            ).fetchall()]
+            for old_id in colliding_ids:
+                highest += 1
+                cursor.execute(
+                    f"UPDATE {table.name} SET {id_column} = ? WHERE {id_column} = ?", (highest, old_id)
+                )
+                if child:
+                    child_table, foreign_key = child
+                    cursor.execute(
+                        f"UPDATE {child_table} SET {foreign_key} = ? WHERE {foreign_key} = ?", (highest, old_id)
+                    )
+            
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table.name,))
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, highest)
+            )
 
 # Initialize with sample data
 def init_data():
@@ -0,0 +1,176 @@
+import time
+from datetime import datetime
+
+from database import Train
+
+# Multiplier on top of base_fare for each passenger class
+TRAVEL_CLASSES = {
+    "sleeper": 1.0,
+    "ac3": 1.75,
+    "ac2": 2.5,
+    "ac1": 4.0,
+}
+DEFAULT_TRAVEL_CLASS = "sleeper"
+
+# Unknown train types are priced like Express
+TRAIN_TYPE_MULTIPLIERS = {
+    "Superfast": 1.2,
+    "Express": 1.0,
+    "Local": 0.6,
+    "Passenger": 0.5,
+}
+
+# (minimum fraction of seats booked, multiplier), lowest band first
+OCCUPANCY_BANDS = [
+    (0.0, 1.0),
+    (0.5, 1.1),
+    (0.75, 1.25),
+    (0.9, 1.5),
+]
+
+# (minimum days to departure, multiplier), furthest out first
+DAYS_TO_DEPARTURE_BANDS = [
+    (30, 0.9),
+    (7, 1.0),
+    (2, 1.15),
+    (0, 1.3),
+]
+
+# The class x days-to-departure grid is the same for every run, so it is built
+# once here and each fare table is this grid scaled by a single per-run factor.
+_CLASS_DAYS_GRID = {
+    (travel_class, days_band): class_multiplier * days_multiplier
+    for travel_class, class_multiplier in TRAVEL_CLASSES.items()
+    for days_band, (_, days_multiplier) in enumerate(DAYS_TO_DEPARTURE_BANDS)
+}
+
+
+class FareTable:
+    def __init__(self, base_fare, train_type, occupancy_band, fares):
+        self.base_fare = base_fare
+        self.train_type = train_type
+        self.occupancy_band = occupancy_band
+        # (travel_class, days_band) -> fare per passenger
+        self.fares = fares
+
+
+# (train_id, occupancy_band) -> FareTable
+_fare_tables = {}
+
+
+def occupancy_band(total_seats, available_seats):
+    if not total_seats:
+        return len(OCCUPANCY_BANDS) - 1
+
+    booked = (total_seats - available_seats) / total_seats
+    band = 0
+    for index, (threshold, _) in enumerate(OCCUPANCY_BANDS):
+        if booked >= threshold:
+            band = index
+    return band
+
+
+def days_to_departure_band(departure_time, now=None):
+    now = now or datetime.utcnow()
+    days = (departure_time - now).days
+    for index, (min_days, _) in enumerate(DAYS_TO_DEPARTURE_BANDS):
+        if days >= min_days:
+            return index
+    return len(DAYS_TO_DEPARTURE_BANDS) - 1
+
+
+def build_fare_table(base_fare, train_type, band):
+    factor = (
+        base_fare
+        * TRAIN_TYPE_MULTIPLIERS.get(train_type, 1.0)
+        * OCCUPANCY_BANDS[band][1]
+    )
+    fares = {key: round(factor * multiplier, 2) for key, multiplier in _CLASS_DAYS_GRID.items()}
+    return FareTable(base_fare, train_type, band, fares)
+
+
+def get_fare_table(train, band=None):
+    # Tables are kept per occupancy band, so crossing a threshold switches to
+    # another cached table. One is only rebuilt the first time its band is
+    # reached or after an admin changed the run's pricing inputs.
+    if band is None:
+        band = occupancy_band(train.total_seats, train.available_seats)
+    table = _fare_tables.get((train.train_id, band))
+    if (
+        table is None
+        or table.base_fare != train.base_fare
+        or table.train_type != train.train_type
+    ):
+        table = build_fare_table(train.base_fare, train.train_type, band)
+        _fare_tables[(train.train_id, band)] = table
+    return table
+
+
+def invalidate(train_id):
+    for band in range(len(OCCUPANCY_BANDS)):
+        _fare_tables.pop((train_id, band), None)
+
+
+def quote(train, travel_class=DEFAULT_TRAVEL_CLASS, now=None):
+    table = get_fare_table(train)
+    days_band = days_to_departure_band(train.departure_time, now)
+    return table.fares[(travel_class, days_band)]
+
+
+def quote_booking(train, travel_class, passengers_count, now=None):
+    # Each seat is priced at the occupancy band it is booked in, so the first
+    # seat costs the fare shown in search and one large booking cannot buy a
+    # whole band's worth of seats at the lower fare.
+    seats_per_band = {}
+    for seat in range(passengers_count):
+        band = occupancy_band(train.total_seats, train.available_seats - seat)
+        seats_per_band[band] = seats_per_band.get(band, 0) + 1
+
+    key = (travel_class, days_to_departure_band(train.departure_time, now))
+    total = 0.0
+    for band, seats in seats_per_band.items():
+        total += get_fare_table(train, band).fares[key] * seats
+    return round(total, 2)
+
+
+def fares_for(train, now=None):
+    table = get_fare_table(train)
+    days_band = days_to_departure_band(train.departure_time, now)
+    return {
+        travel_class: table.fares[(travel_class, days_band)]
+        for travel_class in TRAVEL_CLASSES
+    }
+
+
+def attach_fares(trains, now=None):
+    # Sets the non-persisted fare fields exposed by TrainResponse
+    for train in trains:
+        train.fares = fares_for(train, now)
+        train.current_fare = train.fares[DEFAULT_TRAVEL_CLASS]
+    return trains
+
+
+def reprice_all(db):
+    global _fare_tables
+
+    start = time.perf_counter()
+    rows = db.query(
+        Train.train_id,
+        Train.total_seats,
+        Train.available_seats,
+        Train.base_fare,
+        Train.train_type,
+    ).all()
+
+    tables = {}
+    for row in rows:
+        band = occupancy_band(row.total_seats, row.available_seats)
+        tables[(row.train_id, band)] = build_fare_table(row.base_fare, row.train_type, band)
+
+    # Swap in the new tables at once so concurrent lookups never see a partial set
+    _fare_tables = tables
+
+    return {
+        "trains_repriced": len(tables),
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List
@@ -8,6 +9,9 @@ import secrets
 from database import SessionLocal, create_tables, init_data, User, Train, Booking, Payment, Railway
 import models
 import auth
+import fare_engine
+import availability
+import archive
 
 app = FastAPI(title="Train Booking System", version="1.0.0")
 
@@ -25,6 +29,11 @@ app.add_middleware(
 def startup_event():
     create_tables()
     init_data()
+    db = SessionLocal()
+    try:
+        fare_engine.reprice_all(db)
+    finally:
+        db.close()
 
 # Dependency
 def get_db():
@@ -100,7 +109,29 @@ def get_trains(
     if date:
         query = query.filter(Train.departure_time >= date)
     
-    return query.all()
+    return fare_engine.attach_fares(query.all())
+
+@app.get("/trains/stream")
+async def stream_availability(train_ids: List[int] = Query(...)):
+    if len(train_ids) > availability.MAX_TRAINS_PER_SUBSCRIPTION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot subscribe to more than {availability.MAX_TRAINS_PER_SUBSCRIPTION} trains"
+        )
+    
+    def load_snapshot():
+        db = SessionLocal()
+        try:
+            trains = db.query(Train).filter(Train.train_id.in_(train_ids)).all()
+            return [availability.train_delta(t) for t in trains]
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        availability.broker.stream(train_ids, load_snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/trains", response_model=models.TrainResponse)
 def create_train(
@@ -120,7 +151,7 @@ def create_train(
     db.add(db_train)
     db.commit()
     db.refresh(db_train)
-    return db_train
+    return fare_engine.attach_fares([db_train])[0]
 
 @app.put("/trains/{train_id}", response_model=models.TrainResponse)
 def update_train(
@@ -148,7 +179,10 @@ def update_train(
     
     db.commit()
     db.refresh(db_train)
-    return db_train
+    # Rebuilds the fare table if base_fare, train_type or occupancy changed
+    fare_engine.get_fare_table(db_train)
+    availability.broker.publish(availability.train_delta(db_train))
+    return fare_engine.attach_fares([db_train])[0]
 
 @app.delete("/trains/{train_id}")
 def delete_train(
@@ -173,6 +207,8 @@ def delete_train(
     
     db.delete(db_train)
     db.commit()
+    fare_engine.invalidate(train_id)
+    availability.broker.publish(availability.deleted_delta(train_id))
     return {"message": "Train deleted successfully", "train_id": train_id}
 
 # Booking endpoints
@@ -190,8 +226,11 @@ def create_booking(
     if train.available_seats < booking.passengers_count:
         raise HTTPException(status_code=400, detail="Not enough seats available")
     
-    # Calculate total amount
-    total_amount = train.base_fare * booking.passengers_count
+    if booking.travel_class not in fare_engine.TRAVEL_CLASSES:
+        raise HTTPException(status_code=400, detail="Invalid travel class")
+    
+    # Calculate total amount, pricing each seat at the occupancy band it lands in
+    total_amount = fare_engine.quote_booking(train, booking.travel_class, booking.passengers_count)
     
     # Generate PNR
     pnr_number = secrets.token_hex(5).upper()
@@ -202,7 +241,8 @@ def create_booking(
         train_id=booking.train_id,
         passengers_count=booking.passengers_count,
         total_amount=total_amount,
-        pnr_number=pnr_number
+        pnr_number=pnr_number,
+        travel_class=booking.travel_class
     )
     
     # Update available seats
@@ -212,6 +252,10 @@ def create_booking(
     db.commit()
     db.refresh(db_booking)
     
+    # Refresh the fare table if this booking crossed an occupancy band
+    fare_engine.get_fare_table(train)
+    availability.broker.publish(availability.train_delta(train))
+    
     # Create payment record
     db_payment = Payment(
         booking_id=db_booking.booking_id,
@@ -233,12 +277,13 @@ def create_booking(
 
 @app.get("/bookings", response_model=List[models.BookingResponse])
 def get_user_bookings(
+    skip: int = 0,
+    limit: int = archive.BOOKING_PAGE_SIZE,
     current_user: User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    from sqlalchemy.orm import joinedload
-    bookings = db.query(Booking).options(joinedload(Booking.train)).filter(Booking.user_id == current_user.user_id).all()
-    return bookings
+    # Pages through hot bookings, then archived ones
+    return archive.user_booking_history(db, current_user.user_id, skip, limit)
 
 # Admin endpoints
 @app.get("/admin/trains", response_model=List[models.TrainResponse])
@@ -249,7 +294,7 @@ def get_all_trains(
     if current_user.user_type != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    return db.query(Train).all()
+    return fare_engine.attach_fares(db.query(Train).all())
 
 @app.get("/admin/bookings", response_model=List[models.BookingResponse])
 def get_all_bookings(
@@ -263,6 +308,27 @@ def get_all_bookings(
     bookings = db.query(Booking).options(joinedload(Booking.train)).all()
     return bookings
 
+@app.post("/admin/fares/reprice")
+def reprice_fares(
+    current_user: User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.user_type != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return fare_engine.reprice_all(db)
+
+@app.post("/admin/archive")
+def archive_journeys(
+    archive_after_days: int = archive.ARCHIVE_AFTER_DAYS,
+    current_user: User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.user_type != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return archive.archive_completed_journeys(db, archive_after_days)
+
 # Utility endpoints
 @app.get("/stations")
 def get_stations(db: Session = Depends(get_db)):
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 # User Models
 class UserBase(BaseModel):
@@ -48,6 +48,8 @@ class TrainResponse(TrainBase):
     available_seats: int
     train_status: str
     created_at: datetime
+    current_fare: Optional[float] = None
+    fares: Optional[Dict[str, float]] = None
 
     class Config:
         from_attributes = True
@@ -59,6 +61,7 @@ class BookingBase(BaseModel):
 
 class BookingCreate(BookingBase):
     payment_method: str
+    travel_class: str = "sleeper"
 
 class BookingResponse(BaseModel):
     booking_id: int
@@ -70,6 +73,7 @@ class BookingResponse(BaseModel):
     booking_status: str
     payment_status: str
     pnr_number: str
+    travel_class: str = "sleeper"
     train: Optional['TrainResponse'] = None
 
     class Config:
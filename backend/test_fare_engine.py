@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import fare_engine
+
+
+class StubTrain:
+    def __init__(self, train_id, total_seats, available_seats, base_fare=100.0, train_type="Express"):
+        self.train_id = train_id
+        self.total_seats = total_seats
+        self.available_seats = available_seats
+        self.base_fare = base_fare
+        self.train_type = train_type
+        # Between 7 and 30 days out, where the days-to-departure multiplier is 1.0
+        self.departure_time = datetime.utcnow() + timedelta(days=10, hours=1)
+
+
+def test_single_seat_charges_shown_fare_at_band_threshold():
+    # 4 of 10 booked: the next seat takes occupancy to the 50% threshold
+    train = StubTrain(1, total_seats=10, available_seats=6)
+    fare_engine.invalidate(train.train_id)
+
+    shown = fare_engine.fares_for(train)[fare_engine.DEFAULT_TRAVEL_CLASS]
+    charged = fare_engine.quote_booking(train, fare_engine.DEFAULT_TRAVEL_CLASS, 1)
+
+    assert shown == 100.0
+    assert charged == shown
+
+
+def test_each_seat_priced_at_band_it_is_booked_in():
+    train = StubTrain(2, total_seats=10, available_seats=6)
+    fare_engine.invalidate(train.train_id)
+
+    # Seats booked at 40%, 50%, 60%, 70% and 80% occupancy
+    charged = fare_engine.quote_booking(train, fare_engine.DEFAULT_TRAVEL_CLASS, 5)
+
+    assert charged == 100.0 + 110.0 * 3 + 125.0
+
+
+def test_booking_reuses_cached_band_tables():
+    train = StubTrain(3, total_seats=10, available_seats=6)
+    fare_engine.invalidate(train.train_id)
+
+    fare_engine.quote_booking(train, "ac2", 3)
+    tables = {band: fare_engine.get_fare_table(train, band) for band in (0, 1)}
+    fare_engine.quote_booking(train, "ac2", 3)
+
+    assert all(fare_engine.get_fare_table(train, band) is table for band, table in tables.items())
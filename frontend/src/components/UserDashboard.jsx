@@ -3,11 +3,17 @@ import { useAuth } from "../contexts/AuthContext";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
 
+// Must match MAX_TRAINS_PER_SUBSCRIPTION in backend/availability.py
+const MAX_TRAINS_PER_STREAM = 50;
+// Must match BOOKING_PAGE_SIZE in backend/archive.py
+const BOOKINGS_PAGE_SIZE = 50;
+
 const UserDashboard = () => {
   const { user, logout, API_BASE } = useAuth();
   const navigate = useNavigate();
   const [trains, setTrains] = useState([]);
   const [bookings, setBookings] = useState([]);
+  const [hasMoreBookings, setHasMoreBookings] = useState(false);
   const [stations, setStations] = useState({ sources: [], destinations: [] });
   const [searchParams, setSearchParams] = useState({
     source: "",
@@ -27,6 +33,7 @@ const UserDashboard = () => {
         // Fetch bookings
         const bookingsResponse = await axios.get(`${API_BASE}/bookings`);
         setBookings(bookingsResponse.data);
+        setHasMoreBookings(bookingsResponse.data.length === BOOKINGS_PAGE_SIZE);
         
         // Fetch all available trains
         const trainsResponse = await axios.get(`${API_BASE}/trains`);
@@ -39,10 +46,64 @@ const UserDashboard = () => {
     loadInitialData();
   }, [API_BASE]);
 
+  // Streams are keyed on the trains a search returned. Sold-out and deleted
+  // trains stay in state and are hidden at render time, so they do not make
+  // every viewer reconnect at once.
+  const trainIdsKey = trains.map((train) => train.train_id).join(",");
+  const visibleTrains = trains.filter(
+    (train) => !train.deleted && train.available_seats > 0
+  );
+
+  useEffect(() => {
+    if (!trainIdsKey) return;
+
+    const mergeDeltas = (event) => {
+      const deltas = JSON.parse(event.data);
+      setTrains((current) =>
+        current.map((train) => {
+          const delta = deltas.find((d) => d.train_id === train.train_id);
+          return delta ? { ...train, ...delta } : train;
+        })
+      );
+    };
+
+    // Live seat availability for the trains currently listed, split into
+    // streams of at most MAX_TRAINS_PER_STREAM ids as the server requires
+    const ids = trainIdsKey.split(",");
+    const sources = [];
+    for (let i = 0; i < ids.length; i += MAX_TRAINS_PER_STREAM) {
+      const params = new URLSearchParams();
+      ids
+        .slice(i, i + MAX_TRAINS_PER_STREAM)
+        .forEach((id) => params.append("train_ids", id));
+      const source = new EventSource(`${API_BASE}/trains/stream?${params}`);
+      // The snapshot covers writes made between GET /trains and subscribing
+      source.addEventListener("snapshot", mergeDeltas);
+      source.addEventListener("availability", mergeDeltas);
+      sources.push(source);
+    }
+
+    return () => sources.forEach((source) => source.close());
+  }, [API_BASE, trainIdsKey]);
+
   const fetchBookings = async () => {
     try {
       const response = await axios.get(`${API_BASE}/bookings`);
       setBookings(response.data);
+      setHasMoreBookings(response.data.length === BOOKINGS_PAGE_SIZE);
+    } catch (error) {
+      console.error("Error fetching bookings:", error);
+    }
+  };
+
+  // Older pages may come from archived journeys
+  const loadMoreBookings = async () => {
+    try {
+      const response = await axios.get(
+        `${API_BASE}/bookings?skip=${bookings.length}&limit=${BOOKINGS_PAGE_SIZE}`
+      );
+      setBookings([...bookings, ...response.data]);
+      setHasMoreBookings(response.data.length === BOOKINGS_PAGE_SIZE);
     } catch (error) {
       console.error("Error fetching bookings:", error);
     }
@@ -191,7 +252,7 @@ const UserDashboard = () => {
               </div>
 
               <div className="flights-list">
-                {trains.map((train) => (
+                {visibleTrains.map((train) => (
                   <div key={train.train_id} className="flight-card">
                     <div className="flight-info">
                       <h3>{train.train_number} - {train.train_name}</h3>
@@ -212,7 +273,7 @@ const UserDashboard = () => {
                     </div>
 
                     <div className="flight-actions">
-                      <p className="flight-price">₹{train.base_fare}</p>
+                      <p className="flight-price">₹{train.current_fare ?? train.base_fare}</p>
                       <p className="flight-seats">
                         {train.available_seats} seats available
                       </p>
@@ -233,7 +294,7 @@ const UserDashboard = () => {
                   </div>
                 ))}
 
-                {trains.length === 0 && !loading && (
+                {visibleTrains.length === 0 && !loading && (
                   <p className="no-results">
                     No trains found. Try different search criteria.
                   </p>
@@ -289,6 +350,9 @@ const UserDashboard = () => {
                       <p className="booking-detail">
                         <strong>Passengers:</strong> {booking.passengers_count}
                       </p>
+                      <p className="booking-detail">
+                        <strong>Class:</strong> {booking.travel_class}
+                      </p>
                       <p className="booking-time">
                         <strong>Booked on:</strong>{" "}
                         {new Date(booking.booking_date).toLocaleString('en-US', {
@@ -320,6 +384,12 @@ const UserDashboard = () => {
                 {bookings.length === 0 && (
                   <p className="no-results">No bookings found.</p>
                 )}
+
+                {hasMoreBookings && (
+                  <button onClick={loadMoreBookings} className="search-button">
+                    Load older bookings
+                  </button>
+                )}
               </div>
             </div>
           </div>